@@ -1,13 +1,38 @@
 from flask import Flask, jsonify, request, render_template
+from flask.json.provider import JSONProvider
 import gspread
-from gspread.utils import ValueRenderOption
-from gspread.exceptions import APIError
+from gspread.utils import (
+    ValueInputOption,
+    absolute_range_name,
+    rowcol_to_a1,
+)
+from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound
+from google.oauth2 import service_account
+from cachetools import TTLCache, cached
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import msgpack
+import numpy as np
+import orjson
+import base64
+import binascii
+import datetime
+import hashlib
 import os
 import json
+import random
+import re
+import threading
 import time
 
 # ---------- CONFIG ----------
 MASTER_CONFIG_ID = "1ZAU_kvQEc6_B6-dwL6QdvbUpWkN52kE1zVQHcxBG7Lk"  # GST – Master Config
+HTTP_POOL_SIZE = 32  # keep-alive connections to Google APIs
+# Sheets allows 60 write requests/min per user, i.e. for the whole service
+# account across all workers; each worker process gets an equal share.
+WRITES_PER_MINUTE = 55
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "2"))  # gunicorn -w
 
 # ---------- GOOGLE SHEETS AUTH VIA ENV ----------
 # On Render: set env var SERVICE_ACCOUNT_JSON = full JSON of service account
@@ -15,18 +40,198 @@ SERVICE_ACCOUNT_JSON = os.environ.get("SERVICE_ACCOUNT_JSON")
 if not SERVICE_ACCOUNT_JSON:
     raise RuntimeError("SERVICE_ACCOUNT_JSON env var is not set")
 
-creds_info = json.loads(SERVICE_ACCOUNT_JSON)
-gc = gspread.service_account_from_dict(creds_info)  # supported by gspread [web:133]
+# Optional: REDIS_URL lets all gunicorn workers share one OAuth access token
+REDIS_URL = os.environ.get("REDIS_URL")
+REDIS_TIMEOUT_SECONDS = 0.5  # a slow Redis must not stall token refreshes
+
+
+class SharedTokenCredentials(service_account.Credentials):
+    """
+    Service-account credentials that share their access token through Redis.
+    A worker only signs a JWT and calls Google's token endpoint when no
+    other worker has a valid token cached. Without Redis this behaves like
+    the plain service-account credentials; if Redis is slow, unreachable or
+    holds a corrupt entry, the token is fetched from Google as usual.
+    """
+
+    redis = None  # set below when REDIS_URL is configured
+
+    def refresh(self, request):
+        if self.redis is None:
+            return super().refresh(request)
+
+        key = f"gst-sheets-hub:google-token:{self.service_account_email}"
+        try:
+            cached = self.redis.get(key)
+            if cached:
+                data = json.loads(cached)
+                token = data["token"]
+                expiry = datetime.datetime.fromisoformat(data["expiry"])
+            else:
+                token = expiry = None
+        except Exception:  # Redis is only an optimisation; fall back to Google
+            token = expiry = None
+        if token:
+            self.token, self.expiry = token, expiry
+            if self.valid:
+                return
+
+        super().refresh(request)
+
+        # Expire the shared copy before google-auth would consider it stale
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        ttl = int((self.expiry - now).total_seconds()) - 5 * 60
+        if ttl > 0:
+            try:
+                self.redis.setex(
+                    key,
+                    ttl,
+                    json.dumps(
+                        {"token": self.token, "expiry": self.expiry.isoformat()}
+                    ),
+                )
+            except Exception:
+                pass
+
+
+class SheetsRetry(Retry):
+    """
+    Retry policy for Google APIs. 429 is retried for every method since
+    Google rejects the request before applying it; 5xx only for idempotent
+    methods, so a POST like insertDimension is never applied twice.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def _build_client():
+    if REDIS_URL:
+        import redis  # optional dependency, only needed with REDIS_URL
+
+        SharedTokenCredentials.redis = redis.Redis.from_url(
+            REDIS_URL,
+            socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+            socket_timeout=REDIS_TIMEOUT_SECONDS,
+        )
+
+    creds_info = json.loads(SERVICE_ACCOUNT_JSON)
+    creds = SharedTokenCredentials.from_service_account_info(
+        creds_info, scopes=gspread.auth.DEFAULT_SCOPES
+    )
+    client = gspread.authorize(creds)  # supported by gspread [web:133]
+
+    # One shared session for all threads: reuse TLS connections instead of
+    # handshaking per call, with a pool large enough for concurrent requests.
+    # Rate-limit and transient server errors back off exponentially
+    # (0.5s, 1s, 2s, ...) and honour Retry-After; the final failed response
+    # is still returned so gspread raises its usual APIError.
+    client.http_client.session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=SheetsRetry(
+                total=6,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset(["GET", "PUT"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            ),
+        ),
+    )
+    return client
+
+
+_gc = None
+_gc_lock = threading.Lock()
+
+
+def gc():
+    """
+    Shared gspread client, built on first use: importing the app (each
+    gunicorn worker) and serving the HTML page don't pay for parsing the
+    service-account key and setting up the authorized session.
+    """
+    global _gc
+    if _gc is None:
+        with _gc_lock:
+            if _gc is None:
+                _gc = _build_client()
+    return _gc
+
+
+# Background threads for Sheets calls that can overlap (blocking socket I/O
+# releases the GIL, so independent requests run in parallel).
+SHEETS_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until a token is free, so
+    bursts of writes queue up here instead of hitting Google's quota.
+
+    The bucket holds at most `burst` tokens. Any 60-second window then
+    allows burst + per_minute acquisitions, so keep burst small: a bucket
+    as large as per_minute would let through twice the rate.
+    """
+
+    def __init__(self, per_minute, burst=1):
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.rate = per_minute / 60.0  # tokens per second
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared by all write endpoints in this process
+write_limiter = TokenBucket(WRITES_PER_MINUTE / WEB_CONCURRENCY)
 
 # ---------- FLASK APP ----------
 app = Flask(__name__)
 
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson, used by request.get_json() and
+    jsonify(). Much faster than stdlib json on the large nested lists a sheet
+    is sent/received as. Honours the default and sort_keys arguments of
+    json.dumps; other formatting arguments are ignored.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SORT_KEYS if kwargs.get("sort_keys") else 0
+        return orjson.dumps(obj, default=kwargs.get("default"), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+app.json = OrjsonProvider(app)
+
 # --------- Simple caching for Master Config ---------
-companies_cache = None
-companies_cache_ts = 0
 CACHE_TTL_SECONDS = 60
+SPREADSHEET_CACHE_TTL_SECONDS = 300
 
 
+@cached(TTLCache(maxsize=1, ttl=CACHE_TTL_SECONDS), lock=threading.Lock())
 def load_companies():
     """
     Read all company rows from Master Config sheet.
@@ -35,18 +240,113 @@ def load_companies():
       - CompanyId
       - CompanyName
       - SpreadsheetId
-    """
-    global companies_cache, companies_cache_ts
-    now = time.time()
-    if companies_cache is not None and (now - companies_cache_ts) < CACHE_TTL_SECONDS:
-        return companies_cache
 
-    sh = gc.open_by_key(MASTER_CONFIG_ID)
+    Returns (records, by_id) where by_id maps CompanyId -> row, built once
+    per load and cached together so both always come from the same read.
+    """
+    sh = gc().open_by_key(MASTER_CONFIG_ID)
     ws = sh.get_worksheet(0)
-    records = ws.get_all_records()
-    companies_cache = records
-    companies_cache_ts = now
-    return records
+    raw = ws.get_all_values()
+    if not raw:
+        return [], {}
+    header = raw[0]
+    records = [dict(zip(header, row)) for row in raw[1:]]
+    by_id = {r["CompanyId"]: r for r in records if r.get("CompanyId")}
+    return records, by_id
+
+
+# --------- Caching of company spreadsheet / worksheet metadata ---------
+
+@cached(TTLCache(maxsize=128, ttl=SPREADSHEET_CACHE_TTL_SECONDS), lock=threading.Lock())
+def open_spreadsheet(spreadsheet_id):
+    """Spreadsheet handle reused across requests (open_by_key fetches metadata)."""
+    return gc().open_by_key(spreadsheet_id)
+
+
+@cached(TTLCache(maxsize=128, ttl=SPREADSHEET_CACHE_TTL_SECONDS), lock=threading.Lock())
+def load_worksheets(spreadsheet_id):
+    """All worksheets of a spreadsheet keyed by title, in tab order."""
+    return {ws.title: ws for ws in open_spreadsheet(spreadsheet_id).worksheets()}
+
+
+def forget_worksheets(spreadsheet_id):
+    """Drop cached worksheets so the next lookup re-reads the tab list."""
+    with load_worksheets.cache_lock:
+        load_worksheets.cache.pop(load_worksheets.cache_key(spreadsheet_id), None)
+
+
+def get_worksheet(spreadsheet_id, title):
+    """
+    Worksheet lookup by title on a freshly read tab list. Callers address
+    the sheet by ID, and a cached title may point at a tab that was since
+    renamed or deleted.
+    """
+    forget_worksheets(spreadsheet_id)
+    worksheets = load_worksheets(spreadsheet_id)
+    if title not in worksheets:
+        raise WorksheetNotFound(title)
+    return worksheets[title]
+
+
+# --------- Conditional GET support for sheet reads ---------
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+# (spreadsheet_id, sheet_name, mimetype) -> (etag, serialized response body)
+sheet_response_cache = TTLCache(maxsize=256, ttl=SPREADSHEET_CACHE_TTL_SECONDS)
+sheet_response_cache_lock = threading.Lock()
+
+# Drive's modifiedTime can lag behind a write, so for a while after this
+# process writes to a spreadsheet an unchanged ETag proves nothing.
+WRITE_SETTLE_SECONDS = 60
+recent_writes = TTLCache(maxsize=256, ttl=WRITE_SETTLE_SECONDS)  # id -> True
+
+
+def forget_sheet_responses(spreadsheet_id):
+    """
+    Call after writing to a spreadsheet: drops its cached sheet responses and
+    makes reads skip the ETag shortcuts until WRITE_SETTLE_SECONDS pass.
+    """
+    with sheet_response_cache_lock:
+        for key in [k for k in sheet_response_cache if k[0] == spreadsheet_id]:
+            del sheet_response_cache[key]
+        recent_writes[spreadsheet_id] = True
+
+
+def recently_written(spreadsheet_id):
+    """True within WRITE_SETTLE_SECONDS of a write from this process."""
+    with sheet_response_cache_lock:
+        return spreadsheet_id in recent_writes
+
+
+def sheet_etag(company, sheet_name, mimetype):
+    """
+    ETag for a sheet read, derived from the spreadsheet's Drive modifiedTime
+    (one small Drive call, much cheaper than reading the values). The
+    company fields are hashed too, since the response body carries them
+    from Master Config.
+    """
+    spreadsheet_id = company["SpreadsheetId"]
+    metadata = gc().http_client.get_file_drive_metadata(spreadsheet_id)
+    modified = metadata["modifiedTime"]
+    key = orjson.dumps([company, sheet_name, mimetype, modified])
+    return hashlib.sha1(key).hexdigest()
+
+
+def serialize_sheet_response(payload, mimetype):
+    """
+    Encode a sheet read as JSON, or as msgpack when negotiated: msgpack is
+    smaller for string grids and carries the editable mask as raw bytes
+    instead of base64.
+    """
+    if mimetype == MSGPACK_MIMETYPE:
+        payload = {
+            **payload,
+            "editable_packed": base64.b64decode(payload["editable_packed"]),
+        }
+        return msgpack.packb(payload, use_bin_type=True)
+    return orjson.dumps(payload)
 
 
 @app.route("/")
@@ -60,7 +360,7 @@ def index():
 @app.route("/companies", methods=["GET"])
 def get_companies():
     """Return list of companies for the selection screen."""
-    records = load_companies()
+    records, _ = load_companies()
     data = [
         {
             "CompanyId": r.get("CompanyId"),
@@ -76,8 +376,8 @@ def get_companies():
 @app.route("/company/<company_id>/sheets", methods=["GET"])
 def list_company_sheets(company_id):
     """List all worksheet names inside a company's Google Spreadsheet."""
-    records = load_companies()
-    record = next((r for r in records if r.get("CompanyId") == company_id), None)
+    _, by_id = load_companies()
+    record = by_id.get(company_id)
     if not record:
         return jsonify({"error": "Company not found"}), 404
 
@@ -85,46 +385,166 @@ def list_company_sheets(company_id):
     if not spreadsheet_id:
         return jsonify({"error": "SpreadsheetId missing in Master Config"}), 400
 
-    sh = gc.open_by_key(spreadsheet_id)
+    # Always list fresh tabs; this also warms the cache for the sheet calls
+    forget_worksheets(spreadsheet_id)
     sheet_list = [
         {"sheetName": ws.title, "index": ws.index}
-        for ws in sh.worksheets()
+        for ws in load_worksheets(spreadsheet_id).values()
     ]  # worksheets() lists all tabs [web:170]
     return jsonify(sheet_list)
 
 
-# ---------- COMMON: build editable mask (lock formulas + non-numeric text) ----------
+# ---------- COMMON: numeric cell check ----------
+
+# Plain number as float() would accept it, thousands separators allowed
+NUMERIC_RE = re.compile(r"^\s*[+-]?(\d[\d,]*\.?\d*|\.\d+)([eE][+-]?\d+)?\s*$")
+
+
+def is_numeric(val):
+    """True for numbers and numeric-looking strings like '1,200.50'."""
+    if isinstance(val, str):
+        return NUMERIC_RE.match(val) is not None
+    return isinstance(val, (int, float)) and not isinstance(val, bool)
+
 
-def build_editable_mask(values_display, values_formula):
+# ---------- COMMON: bit-packed editable mask for transit ----------
+
+def unpack_editable_mask(editable_packed, rows, cols):
     """
-    Returns a 2D list of booleans:
-      - False for formulas and non-numeric text (headings/labels)
-      - True  for numeric values and empty cells
+    Decode an editable_packed mask (see read_sheet_payload) into a
+    (rows, cols) bool ndarray. Raises ValueError on a malformed mask.
     """
-    editable_mask = []
-    for row_disp, row_form in zip(values_display, values_formula):
-        row_mask = []
-        for disp, form in zip(row_disp, row_form):
-            # 1) Lock formulas
-            if isinstance(form, str) and form.startswith("="):
-                row_mask.append(False)
-                continue
+    if not isinstance(rows, int) or not isinstance(cols, int) or rows < 0 or cols < 0:
+        raise ValueError("rows and cols must be non-negative integers")
+    packed = np.frombuffer(base64.b64decode(editable_packed), dtype=np.uint8)
+    if len(packed) * 8 < rows * cols:
+        raise ValueError("editable_packed is shorter than rows x cols")
+    return np.unpackbits(packed, count=rows * cols).reshape(rows, cols).astype(bool)
 
-            # 2) Lock non-numeric (text) cells = headings/labels
-            s = str(disp).strip()
-            if s == "":
-                # Empty cell -> editable
-                row_mask.append(True)
-            else:
-                try:
-                    float(s.replace(",", ""))
-                    # Numeric value -> editable
-                    row_mask.append(True)
-                except ValueError:
-                    # Not numeric -> heading/label/text -> lock
-                    row_mask.append(False)
-        editable_mask.append(row_mask)
-    return editable_mask
+
+def mask_to_rectangles(mask):
+    """
+    Cover the True cells of a 2D bool array with rectangles containing only
+    True cells: each row is split into runs of consecutive True cells, and
+    identical runs in consecutive rows are merged.
+
+    Returns a list of (row0, col0, row1, col1), all 0-based and inclusive.
+    """
+    rects = []
+    growing = {}  # (col0, col1) -> row0 of a rectangle still being extended
+    for r, row in enumerate(mask):
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], row, [0])).astype(np.int8)))
+        spans = set(zip(edges[::2].tolist(), (edges[1::2] - 1).tolist()))
+        for span in [s for s in growing if s not in spans]:
+            rects.append((growing.pop(span), span[0], r - 1, span[1]))
+        for span in spans:
+            growing.setdefault(span, r)
+    for span, r0 in growing.items():
+        rects.append((r0, span[0], len(mask) - 1, span[1]))
+    return sorted(rects)
+
+
+# ---------- COMMON: Google API errors ----------
+
+def upstream_error(e):
+    """
+    JSON response for an APIError that is not the caller's fault:
+    503 when Google's quota is exhausted (429), 502 for anything else.
+    """
+    status = 503 if e.response.status_code == 429 else 502
+    return jsonify({"error": f"Google Sheets request failed: {e}"}), status
+
+
+# ---------- COMMON: read sheet values + editable mask in one call ----------
+
+def _is_blank(cell):
+    """Grid cell with nothing displayed and no formula."""
+    return cell.get("formattedValue", "") == "" and (
+        "formulaValue" not in cell.get("userEnteredValue", {})
+    )
+
+
+def read_grid_cells(spreadsheet_id, sheet_name, fields):
+    """
+    Read a whole worksheet with a single spreadsheets.get (includeGridData)
+    call, addressed by ID and range so no Spreadsheet/Worksheet lookup is
+    needed first. `fields` picks the cell fields, e.g. "userEnteredValue".
+
+    Returns a list of rows, each a list of cell dicts (rows may be short).
+    Raises APIError if the sheet does not exist.
+    """
+    data = gc().http_client.fetch_sheet_metadata(
+        spreadsheet_id,
+        params={
+            "ranges": absolute_range_name(sheet_name),
+            "includeGridData": "true",
+            "fields": f"sheets(data(rowData(values({fields}))))",
+        },
+    )
+    return [
+        row.get("values", [])
+        for row in data["sheets"][0]["data"][0].get("rowData", [])
+    ]
+
+
+def read_sheet_payload(spreadsheet_id, sheet_name):
+    """
+    Read a whole worksheet with read_grid_cells(). Each cell carries both its
+    displayed value and what the user entered, so formulas come back
+    alongside their computed results.
+
+    Returns the response fields:
+      - values: displayed values as a rectangular 2D list trimmed to the used
+        range, same shape as ws.get_all_values()
+      - editable_packed: base64, one bit per cell (row-major, MSB first):
+          0 for formulas and non-numeric text (headings/labels)
+          1 for numeric values and empty cells
+      - rows, cols
+    Raises APIError if the sheet does not exist.
+    """
+    row_cells = read_grid_cells(
+        spreadsheet_id, sheet_name, "formattedValue,userEnteredValue"
+    )
+
+    # Used range: drop trailing empty cells and rows (values API does the same)
+    widths = []
+    for cells in row_cells:
+        width = len(cells)
+        while width and _is_blank(cells[width - 1]):
+            width -= 1
+        widths.append(width)
+    while widths and not widths[-1]:
+        widths.pop()
+    rows = len(widths)
+    cols = max(widths, default=0)
+
+    # Single pass over the cells: build the displayed values and clear the
+    # bit of every locked cell. Padding past a row's end stays editable.
+    bits = bytearray(b"\xff" * ((rows * cols + 7) // 8))
+    if (rows * cols) % 8:
+        bits[-1] = (0xFF << (8 - (rows * cols) % 8)) & 0xFF
+    values = []
+    for r in range(rows):
+        cells = row_cells[r]
+        row = [""] * cols
+        for c in range(widths[r]):
+            cell = cells[c]
+            disp = cell.get("formattedValue", "")
+            row[c] = disp
+            # Lock formulas and non-numeric (text) cells = headings/labels
+            if "formulaValue" in cell.get("userEnteredValue", {}) or not (
+                disp.strip() == "" or is_numeric(disp)
+            ):
+                i = r * cols + c
+                bits[i >> 3] &= ~(0x80 >> (i & 7))
+        values.append(row)
+
+    return {
+        "values": values,
+        "editable_packed": base64.b64encode(bits).decode(),
+        "rows": rows,
+        "cols": cols,
+    }
 
 
 # ---------------- SHEET READ ---------------- #
@@ -133,6 +553,11 @@ def build_editable_mask(values_display, values_formula):
 def get_company_sheet(company_id):
     """
     Return full sheet values + editable mask for a given company + sheet.
+    Supports conditional GET: responses carry an ETag and a matching
+    If-None-Match gets 304 Not Modified.
+
+    Sent as JSON by default, or as msgpack (editable_packed as raw bytes)
+    when the client sends Accept: application/msgpack.
 
     Query parameter:
       ?sheet=<sheet_name>
@@ -141,8 +566,8 @@ def get_company_sheet(company_id):
     if not sheet_name:
         return jsonify({"error": "sheet parameter is required"}), 400
 
-    records = load_companies()
-    record = next((r for r in records if r.get("CompanyId") == company_id), None)
+    _, by_id = load_companies()
+    record = by_id.get(company_id)
     if not record:
         return jsonify({"error": "Company not found"}), 404
 
@@ -150,32 +575,56 @@ def get_company_sheet(company_id):
     if not spreadsheet_id:
         return jsonify({"error": "SpreadsheetId missing in Master Config"}), 400
 
-    sh = gc.open_by_key(spreadsheet_id)
+    company = {
+        "CompanyId": record.get("CompanyId"),
+        "CompanyName": record.get("CompanyName"),
+        "SpreadsheetId": spreadsheet_id,
+    }
+
+    # Unchanged spreadsheet -> answer 304, or reuse the serialized body,
+    # without reading the values again. A client sending
+    # Cache-Control: no-cache (reload after save) always gets a fresh read,
+    # and so does everyone shortly after a write, since Drive's modifiedTime
+    # can lag behind it. The ETag is only an optimisation: if Drive can't be
+    # asked, the sheet is served without one.
+    mimetype = request.accept_mimetypes.best_match(
+        [JSON_MIMETYPE, MSGPACK_MIMETYPE], default=JSON_MIMETYPE
+    )
     try:
-        ws = sh.worksheet(sheet_name)
-    except Exception as e:
-        return jsonify({"error": f"Sheet '{sheet_name}' not found: {e}"}), 404
-
-    # 1) Display values (what user sees)
-    values_display = ws.get_all_values()
-
-    # 2) Same range, but formulas preserved
-    values_formula = ws.get_values(value_render_option=ValueRenderOption.formula)
-
-    editable_mask = build_editable_mask(values_display, values_formula)
+        etag = sheet_etag(company, sheet_name, mimetype)
+    except APIError:
+        etag = None
+    fresh = bool(request.cache_control.no_cache) or recently_written(spreadsheet_id)
+    if etag and not fresh and request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        key = (spreadsheet_id, sheet_name, mimetype)
+        with sheet_response_cache_lock:
+            cached_entry = sheet_response_cache.get(key)
+        if etag and not fresh and cached_entry and cached_entry[0] == etag:
+            body = cached_entry[1]
+        else:
+            try:
+                sheet_data = read_sheet_payload(spreadsheet_id, sheet_name)
+            except APIError as e:
+                # A range naming a missing tab is a 400 from Sheets
+                if e.response.status_code != 400:
+                    return upstream_error(e)
+                return jsonify({"error": f"Sheet '{sheet_name}' not found: {e}"}), 404
+
+            body = serialize_sheet_response(
+                {"company": company, "sheet": sheet_name, **sheet_data}, mimetype
+            )
+            if etag and not recently_written(spreadsheet_id):
+                with sheet_response_cache_lock:
+                    sheet_response_cache[key] = (etag, body)
+        response = app.response_class(body, mimetype=mimetype)
 
-    return jsonify(
-        {
-            "company": {
-                "CompanyId": record.get("CompanyId"),
-                "CompanyName": record.get("CompanyName"),
-                "SpreadsheetId": spreadsheet_id,
-            },
-            "sheet": sheet_name,
-            "values": values_display,
-            "editable": editable_mask,
-        }
-    )
+    if etag:
+        response.set_etag(etag)
+    response.vary.add("Accept")
+    response.cache_control.no_cache = True  # browser must revalidate each time
+    return response
 
 
 # ---------------- SHEET UPDATE ---------------- #
@@ -184,10 +633,19 @@ def get_company_sheet(company_id):
 def update_company_sheet(company_id):
     """
     Overwrite only editable cells in a given sheet, keeping formulas and locked
-    text untouched.
+    text untouched. Only cells the user changed are written, coalesced into
+    rectangles and sent in one values.batchUpdate call.
 
     URL:
       POST /sheet/<company_id>/update?sheet=<sheet_name>
+
+    Body JSON:
+      {
+        "values": <2D list>,
+        "editable_packed": "<mask from GET>", "rows": R, "cols": C,
+        "dirty_packed": "<changed cells, same packing>"  (optional; all
+                                                          editable if absent)
+      }
     """
     sheet_name = request.args.get("sheet")
     if not sheet_name:
@@ -195,13 +653,27 @@ def update_company_sheet(company_id):
 
     payload = request.get_json(force=True) or {}
     new_values = payload.get("values")
-    editable = payload.get("editable")
+    editable_packed = payload.get("editable_packed")
 
-    if not isinstance(new_values, list) or not isinstance(editable, list):
-        return jsonify({"error": "values and editable must be 2D lists"}), 400
+    if not isinstance(new_values, list) or not isinstance(editable_packed, str):
+        return jsonify({"error": "values and editable_packed are required"}), 400
+    if not all(isinstance(row, list) for row in new_values):
+        return jsonify({"error": "values must be a list of rows (lists)"}), 400
 
-    records = load_companies()
-    record = next((r for r in records if r.get("CompanyId") == company_id), None)
+    try:
+        editable = unpack_editable_mask(
+            editable_packed, payload.get("rows"), payload.get("cols")
+        )
+        dirty_packed = payload.get("dirty_packed")
+        if dirty_packed is not None:
+            editable &= unpack_editable_mask(
+                dirty_packed, payload.get("rows"), payload.get("cols")
+            )
+    except (ValueError, TypeError, binascii.Error) as e:
+        return jsonify({"error": f"Invalid editable mask: {e}"}), 400
+
+    _, by_id = load_companies()
+    record = by_id.get(company_id)
     if not record:
         return jsonify({"error": "Company not found"}), 404
 
@@ -209,31 +681,45 @@ def update_company_sheet(company_id):
     if not spreadsheet_id:
         return jsonify({"error": "SpreadsheetId missing in Master Config"}), 400
 
-    sh = gc.open_by_key(spreadsheet_id)
-    try:
-        ws = sh.worksheet(sheet_name)
-    except Exception as e:
-        return jsonify({"error": f"Sheet '{sheet_name}' not found: {e}"}), 404
+    # Write only the changed cells the client mask marks as editable. The
+    # mask was issued by the matching GET, so formulas/locked text are never
+    # touched and no pre-read of the sheet is needed.
+    rows = min(editable.shape[0], len(new_values))
+    write_mask = editable[:rows]
+    widths = np.array([len(row) for row in new_values[:rows]], dtype=int)
+    write_mask &= np.arange(write_mask.shape[1]) < widths[:, None]
 
-    # Get current sheet with formulas preserved
-    current = ws.get_values(value_render_option=ValueRenderOption.formula)
+    data = [
+        {
+            "range": absolute_range_name(
+                sheet_name,
+                f"{rowcol_to_a1(r0 + 1, c0 + 1)}:{rowcol_to_a1(r1 + 1, c1 + 1)}",
+            ),
+            "values": [row[c0:c1 + 1] for row in new_values[r0:r1 + 1]],
+        }
+        for r0, c0, r1, c1 in mask_to_rectangles(write_mask)
+    ]
 
-    # Merge new values into current only where editable == True
-    rows = min(len(current), len(new_values))
-    for r in range(rows):
-        cols = min(len(current[r]), len(new_values[r]))
-        for c in range(cols):
-            can_edit = (
-                r < len(editable)
-                and c < len(editable[r])
-                and editable[r][c] is True
+    # Ranges name the sheet directly; a missing tab fails the write itself
+    if data:
+        write_limiter.acquire()
+        forget_sheet_responses(spreadsheet_id)
+        try:
+            gc().http_client.values_batch_update(
+                spreadsheet_id,
+                body={
+                    "valueInputOption": ValueInputOption.user_entered,
+                    "data": data,
+                },
             )
-            if can_edit:
-                current[r][c] = new_values[r][c]
+        except APIError as e:
+            if e.response.status_code != 400:
+                return upstream_error(e)
+            return jsonify({"error": f"Cannot update sheet '{sheet_name}': {e}"}), 400
 
-    # Write merged data back starting at A1
-    ws.update("A1", current, value_input_option="USER_ENTERED")
-    return jsonify({"status": "ok", "rows": rows, "sheet": sheet_name})
+    return jsonify(
+        {"status": "ok", "rows": rows, "ranges": len(data), "sheet": sheet_name}
+    )
 
 
 # ---------------- INSERT ROW BELOW ---------------- #
@@ -262,8 +748,8 @@ def insert_row(company_id):
     # UI uses 0-based. Sheets is 1-based. Insert *below* => +2
     insert_at = int(row_index) + 2
 
-    records = load_companies()
-    record = next((r for r in records if r.get("CompanyId") == company_id), None)
+    _, by_id = load_companies()
+    record = by_id.get(company_id)
     if not record:
         return jsonify({"error": "Company not found"}), 404
 
@@ -271,25 +757,55 @@ def insert_row(company_id):
     if not spreadsheet_id:
         return jsonify({"error": "SpreadsheetId missing in Master Config"}), 400
 
-    sh = gc.open_by_key(spreadsheet_id)
     try:
-        ws = sh.worksheet(sheet_name)
-    except Exception as e:
+        ws = get_worksheet(spreadsheet_id, sheet_name)
+    except (WorksheetNotFound, SpreadsheetNotFound) as e:
         return jsonify({"error": f"Sheet '{sheet_name}' not found: {e}"}), 404
+    except APIError as e:
+        return upstream_error(e)
 
-    # Insert a completely empty row; formulas/ranges shift automatically
-    ws.insert_row([], index=insert_at)
+    # Insert a completely empty row; formulas/ranges shift automatically.
+    # A bare insertDimension is one write request, where ws.insert_row()
+    # would also append an empty row of values (a second write).
+    write_limiter.acquire()
+    forget_sheet_responses(spreadsheet_id)
+    try:
+        gc().http_client.batch_update(
+            spreadsheet_id,
+            body={
+                "requests": [
+                    {
+                        "insertDimension": {
+                            "range": {
+                                "sheetId": ws.id,
+                                "dimension": "ROWS",
+                                "startIndex": insert_at - 1,
+                                "endIndex": insert_at,
+                            },
+                            "inheritFromBefore": False,
+                        }
+                    }
+                ]
+            },
+        )
+    except APIError as e:
+        if e.response.status_code != 400:
+            return upstream_error(e)
+        return jsonify({"error": f"Cannot insert row in '{sheet_name}': {e}"}), 400
 
     # Re-read sheet and mask so frontend stays in sync
-    values_display = ws.get_all_values()
-    values_formula = ws.get_values(value_render_option=ValueRenderOption.formula)
-    editable_mask = build_editable_mask(values_display, values_formula)
+    try:
+        sheet_data = read_sheet_payload(spreadsheet_id, sheet_name)
+    except APIError as e:
+        # The row is in; only the refresh failed, so say so
+        status = 503 if e.response.status_code == 429 else 502
+        error = f"Row inserted, but re-reading the sheet failed: {e}"
+        return jsonify({"error": error, "inserted": True}), status
 
     return jsonify(
         {
             "sheet": sheet_name,
-            "values": values_display,
-            "editable": editable_mask,
+            **sheet_data,
         }
     )
 
@@ -314,8 +830,8 @@ def clone_company_sheet(company_id):
     if not source_name or not new_name:
         return jsonify({"error": "source_sheet and new_sheet are required"}), 400
 
-    records = load_companies()
-    record = next((r for r in records if r.get("CompanyId") == company_id), None)
+    _, by_id = load_companies()
+    record = by_id.get(company_id)
     if not record:
         return jsonify({"error": "Company not found"}), 404
 
@@ -323,54 +839,91 @@ def clone_company_sheet(company_id):
     if not spreadsheet_id:
         return jsonify({"error": "SpreadsheetId missing in Master Config"}), 400
 
-    sh = gc.open_by_key(spreadsheet_id)
-
-    # 1) Get source worksheet
+    # 1) The source's cells are read by tab name, so fetch them in the
+    #    background while the tab list is read for the source's sheet ID
+    cells_future = SHEETS_EXECUTOR.submit(
+        read_grid_cells, spreadsheet_id, source_name, "userEnteredValue"
+    )
     try:
-        src_ws = sh.worksheet(source_name)
-    except Exception as e:
+        src_ws = get_worksheet(spreadsheet_id, source_name)
+    except (WorksheetNotFound, SpreadsheetNotFound) as e:
         return jsonify({"error": f"Source sheet '{source_name}' not found: {e}"}), 404
+    except APIError as e:
+        return upstream_error(e)
 
-    # 2) Duplicate entire sheet structure (formats + formulas + values)
+    # 2) Find the numeric cells to clear from what the user entered in the
+    #    source: numberValue covers dates, percentages and currency whatever
+    #    their display format; numeric-looking text is cleared too, while
+    #    formulas, booleans and other text (headings) are kept
     try:
-        duplicated_ws = sh.duplicate_sheet(src_ws.id, new_sheet_name=new_name)
+        row_cells = cells_future.result()
     except APIError as e:
+        return upstream_error(e)
+    flags = [
+        [
+            "numberValue" in entered or is_numeric(entered.get("stringValue"))
+            for entered in (cell.get("userEnteredValue", {}) for cell in cells)
+        ]
+        for cells in row_cells
+    ]
+    width = max(map(len, flags), default=0)
+    clear_mask = np.array(
+        [row + [False] * (width - len(row)) for row in flags], dtype=bool
+    ).reshape(len(flags), width)
+
+    # 3) Pick the new sheet's ID up front so the clean-up below can target it
+    #    in the same batchUpdate as the duplicate
+    taken_ids = {ws.id for ws in load_worksheets(spreadsheet_id).values()}
+    new_sheet_id = random.randint(1, 2**31 - 1)
+    while new_sheet_id in taken_ids:
+        new_sheet_id = random.randint(1, 2**31 - 1)
+
+    # 4) One API call, applied atomically by Sheets:
+    #    - duplicate entire sheet structure (formats + formulas + values)
+    #    - clear the numeric cells found above, as rectangles; only the
+    #      value is reset, formats stay
+    clear_requests = [
+        {
+            "repeatCell": {
+                "range": {
+                    "sheetId": new_sheet_id,
+                    "startRowIndex": r0,
+                    "endRowIndex": r1 + 1,
+                    "startColumnIndex": c0,
+                    "endColumnIndex": c1 + 1,
+                },
+                "cell": {},
+                "fields": "userEnteredValue",
+            }
+        }
+        for r0, c0, r1, c1 in mask_to_rectangles(clear_mask)
+    ]
+    write_limiter.acquire()
+    try:
+        gc().http_client.batch_update(
+            spreadsheet_id,
+            body={
+                "requests": [
+                    {
+                        "duplicateSheet": {
+                            "sourceSheetId": src_ws.id,
+                            "newSheetId": new_sheet_id,
+                            "newSheetName": new_name,
+                        }
+                    },
+                    *clear_requests,
+                ]
+            },
+        )
+    except APIError as e:
+        # 400 = bad request, e.g. a tab with that name already exists
+        if e.response.status_code != 400:
+            return upstream_error(e)
         return jsonify({"error": f"Cannot create sheet '{new_name}': {e}"}), 400
-
-    new_ws_obj = duplicated_ws  # Worksheet instance.
-
-    # 3) Get formulas/values from new sheet
-    formulas = new_ws_obj.get_values(
-        value_render_option=ValueRenderOption.formula
-    )
-
-    # 4) Build cleaned matrix:
-    #    - keep all formulas
-    #    - keep all text (headings)
-    #    - clear only numeric values
-    cleaned = []
-    for row in formulas:
-        cleaned_row = []
-        for val in row:
-            # keep formulas
-            if isinstance(val, str) and val.startswith("="):
-                cleaned_row.append(val)
-            else:
-                s = str(val).strip()
-                if s == "":
-                    cleaned_row.append("")
-                else:
-                    try:
-                        float(s.replace(",", ""))
-                        # numeric -> clear
-                        cleaned_row.append("")
-                    except (ValueError, TypeError):
-                        # not numeric -> heading/label/text -> keep
-                        cleaned_row.append(val)
-        cleaned.append(cleaned_row)
-
-    # 5) Write cleaned data back to new sheet
-    new_ws_obj.update("A1", cleaned, value_input_option="USER_ENTERED")
+    finally:
+        # Tab list changed (or may have, if the API call half-failed)
+        forget_worksheets(spreadsheet_id)
+        forget_sheet_responses(spreadsheet_id)
 
     return jsonify(
         {
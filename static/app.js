@@ -3,8 +3,17 @@ let currentCompanyId = null;
 let currentCompanyName = null;
 let currentSheetName = null;
 
-let sheetValues = [];   // 2D array of displayed values
-let editableMask = [];  // 2D array of booleans
+let sheetValues = [];     // 2D array of displayed values
+let editablePacked = "";  // base64 bit-packed editable mask (sent back on save)
+let editableBits = new Uint8Array(0);  // decoded bytes of editablePacked
+let dirtyBits = new Uint8Array(0);     // cells edited since load, same packing
+let sheetRows = 0;
+let sheetCols = 0;
+
+// Google's modified time can lag behind a write, so for a while after
+// this page writes, sheet loads bypass the browser's cached copy.
+const WRITE_SETTLE_MS = 60 * 1000;
+let lastWriteAt = 0;
 
 // ---------- HELPERS ----------
 function setStatus(id, msg) {
@@ -12,6 +21,35 @@ function setStatus(id, msg) {
   if (el) el.textContent = msg;
 }
 
+// Store sheet values + bit-packed editable mask from a server response
+function setSheetData(data) {
+  sheetValues = data.values || [];
+  editablePacked = data.editable_packed || "";
+  editableBits = Uint8Array.from(atob(editablePacked), (ch) => ch.charCodeAt(0));
+  sheetRows = data.rows || 0;
+  sheetCols = data.cols || 0;
+  dirtyBits = new Uint8Array(Math.ceil((sheetRows * sheetCols) / 8));
+}
+
+// One bit per cell, row-major, most significant bit first
+function isEditable(rIdx, cIdx) {
+  if (rIdx >= sheetRows || cIdx >= sheetCols) return false;
+  const i = rIdx * sheetCols + cIdx;
+  return ((editableBits[i >> 3] >> (7 - (i & 7))) & 1) === 1;
+}
+
+function markDirty(rIdx, cIdx) {
+  if (rIdx >= sheetRows || cIdx >= sheetCols) return;
+  const i = rIdx * sheetCols + cIdx;
+  dirtyBits[i >> 3] |= 1 << (7 - (i & 7));
+}
+
+function packBits(bits) {
+  let s = "";
+  for (let i = 0; i < bits.length; i++) s += String.fromCharCode(bits[i]);
+  return btoa(s);
+}
+
 function showCompanyScreen() {
   document.getElementById("companyScreen").style.display = "block";
   document.getElementById("companyDetailScreen").style.display = "none";
@@ -91,19 +129,22 @@ async function loadSheetsForCompany() {
 }
 
 // ---------- LOAD A SHEET ----------
-async function loadSheet(sheetName) {
+// fresh=true skips the browser's cached copy (used right after saving,
+// before Google's modified time may have caught up).
+async function loadSheet(sheetName, fresh = false) {
   if (!currentCompanyId) return;
   currentSheetName = sheetName;
+  fresh = fresh || Date.now() - lastWriteAt < WRITE_SETTLE_MS;
 
   setStatus("statusLoading", `Loading sheet: ${sheetName}...`);
 
   const resp = await fetch(
-    `/sheet/${currentCompanyId}?sheet=${encodeURIComponent(sheetName)}`
+    `/sheet/${currentCompanyId}?sheet=${encodeURIComponent(sheetName)}`,
+    fresh ? { cache: "reload" } : {}
   );
   const data = await resp.json();
 
-  sheetValues = data.values || [];
-  editableMask = data.editable || [];
+  setSheetData(data);
 
   renderSheet();
   setStatus("statusLoading", `Loaded sheet: ${sheetName}`);
@@ -121,10 +162,7 @@ function renderSheet() {
       const td = document.createElement("td");
       td.textContent = cell;
 
-      const editable =
-        editableMask[rIdx] && editableMask[rIdx][cIdx] === true;
-
-      if (editable) {
+      if (isEditable(rIdx, cIdx)) {
         td.contentEditable = "true";
       } else {
         td.contentEditable = "false";
@@ -136,6 +174,7 @@ function renderSheet() {
 
       td.addEventListener("input", () => {
         sheetValues[rIdx][cIdx] = td.textContent;
+        markDirty(rIdx, cIdx);
       });
 
       tr.appendChild(td);
@@ -167,16 +206,17 @@ async function insertRowBelow(rowIndex) {
     }),
   });
 
+  lastWriteAt = Date.now();
   const data = await resp.json();
   if (!resp.ok) {
     alert(data.error || "Failed to insert row");
     setStatus("statusLoading", "Insert row failed.");
+    if (data.inserted) await loadSheet(currentSheetName, true);
     return;
   }
 
   // Refresh local state with returned data
-  sheetValues = data.values || [];
-  editableMask = data.editable || [];
+  setSheetData(data);
   renderSheet();
 
   setStatus(
@@ -200,11 +240,15 @@ async function saveChanges() {
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({
         values: sheetValues,
-        editable: editableMask,
+        editable_packed: editablePacked,
+        rows: sheetRows,
+        cols: sheetCols,
+        dirty_packed: packBits(dirtyBits),
       }),
     }
   );
 
+  lastWriteAt = Date.now();
   const data = await resp.json();
   if (!resp.ok) {
     alert(data.error || "Save failed");
@@ -212,6 +256,7 @@ async function saveChanges() {
     return;
   }
 
+  dirtyBits.fill(0);
   setStatus("statusLoading", "Saved successfully.");
 }
 
@@ -219,7 +264,7 @@ async function saveChanges() {
 async function saveAndReload() {
   await saveChanges();
   if (currentSheetName) {
-    await loadSheet(currentSheetName);
+    await loadSheet(currentSheetName, true);
   }
 }
 
@@ -244,6 +289,7 @@ async function cloneSheetFromApr() {
     }),
   });
 
+  lastWriteAt = Date.now();
   const data = await resp.json();
   if (!resp.ok) {
     alert(data.error || "Clone failed");